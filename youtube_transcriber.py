@@ -1,15 +1,27 @@
+import asyncio
+import hashlib
 import json
 import logging
 import os
-from datetime import datetime
+import re
+import shelve
+import subprocess
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timedelta
 from typing import Optional, Tuple
 
+import ctranslate2
 import google.generativeai as genai
-import torch
-import whisper
+import httpx
+from google.generativeai import caching as genai_caching
+import numpy as np
+import orjson
 import yt_dlp
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 from dotenv import load_dotenv
-from googletrans import Translator
 
 load_dotenv()
 
@@ -23,12 +35,57 @@ OUTPUT_DIR = "./output/"
 PROMPTS_DIR = "./prompts/"
 VIDEO_INFO_FILENAME = "video_info.json"
 WHISPER_MODEL_SIZE = "small"
+# 文字起こしバックエンド（"faster-whisper"・"whisper.cpp"・"transformers"）
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "faster-whisper")
+WHISPER_CPP_MODEL_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "whisper.cpp")
+WHISPER_CPP_QUANTIZATION = "q5_0"
+# 長時間音声を30秒のウィンドウに分割し、エンコーダへまとめて入力する設定
+TRANSCRIBE_CHUNK_LENGTH_S = 30
+TRANSCRIBE_STRIDE_LENGTH_S = 5
+TRANSCRIBE_BATCH_SIZE = 16
+# Silero VADで無音区間を除外し、エンコーダの無駄なパスと幻覚を減らす設定
+VAD_PARAMETERS = {"min_silence_duration_ms": 500}
+# Whisperが消費するサンプリングレート（全バックエンド共通）
+WHISPER_SAMPLE_RATE = 16000
+# デコーダが2層のdistil-whisper（英語専用）。対応言語以外は通常のWhisperにフォールバックする
+DISTIL_MODEL = "distil-whisper/distil-small.en"
+DISTIL_SUPPORTED_LANGUAGES = {"en"}
+LANGUAGE_DETECTION_MODEL = "openai/whisper-tiny"
+# 投機的デコード。ドラフトモデルがKトークンを提案し、本体モデルが一括検証する。
+# バッチ処理と併用できないため（batch_size=1 が必要）、環境変数で有効化する
+SPECULATIVE_DECODING = os.getenv("WHISPER_SPECULATIVE", "0") == "1"
+ASSISTANT_MODEL = "openai/whisper-tiny"
+ASSISTANT_MODEL_EN = "openai/whisper-tiny.en"
+
+# プロセス内で使い回すドラフトモデルのキャッシュ
+_assistant_models: dict = {}
+
+# プロセス内で使い回すtransformersパイプラインと言語検出モデルのキャッシュ
+_transformers_pipelines: dict = {}
+_language_detector: Optional[tuple] = None
+_transformers_lock = threading.Lock()
+
+# プロセス内で使い回すWhisperモデル（数百MBの読み込みを一度だけにする）
+_whisper_pipeline: Optional[BatchedInferencePipeline] = None
+_whisper_lock = threading.Lock()
+
+# プロセス内で使い回すwhisper.cppモデル（GGMLの逆シリアライズを一度だけにする）
+_whisper_cpp_model = None
+_whisper_cpp_lock = threading.Lock()
+
+# HTTP/2のキープアライブ接続を使い回し、リクエストごとのTLSハンドシェイクを省く
+_http_client = httpx.AsyncClient(http2=True, timeout=30)
 TRANSCRIPT_FILENAME = "transcript.txt"
 TRANSCRIPT_REFINED_FILENAME = "transcript_refined.txt"
 TRANSLATED_TRANSCRIPT_FILENAME = "transcript_{lang}.txt"
 SUMMARY_FILENAME = "summary.txt"
-AUDIO_FILENAME = "audio.mp3"
+# 再エンコードを避けるため拡張子は配信ストリームに合わせる（m4a/webmなど）
+AUDIO_FILENAME_TEMPLATE = "audio.{ext}"
 TARGET_LANGUAGE = "ja"
+TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+# 翻訳APIが暗黙に切り捨てる上限（約5000文字）を超えないチャンクサイズ
+TRANSLATE_CHUNK_CHARS = 4500
 SYSTEM_PROMPT_FILENAME = "system_prompt.txt"
 SYSTEM_PROMPT_REFINE_FILENAME = "system_prompt_refine.txt"
 
@@ -40,16 +97,24 @@ if not GEMINI_API_KEY:
 
 genai.configure(api_key=GEMINI_API_KEY)
 GEMINI_MODEL_NAME = "gemini-1.5-flash"  # または "gemini-1.5-pro" など
+# 同一内容の再処理（クラッシュ後の再実行など）でAPI呼び出しを省くローカルキャッシュ
+GEMINI_CACHE_PATH = os.path.join(OUTPUT_DIR, ".gemini_cache", "cache")
+GEMINI_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60  # 30日
+# サーバー側コンテキストキャッシュ（システムプロンプトのプリフィル再利用）のTTL
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = 60 * 60  # 1時間
 
 
 def create_output_folder() -> str:
     """タイムスタンプに基づいた新しい出力フォルダを作成します。
 
+    タイムスタンプは秒精度のため、同一秒内の実行同士が同じフォルダを
+    共有して成果物を上書きしないよう、ランダムなサフィックスを付けます。
+
     Returns:
         str: 作成された出力フォルダのパス。
     """
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    folder_path = os.path.join(OUTPUT_DIR, timestamp)
+    folder_path = os.path.join(
+        OUTPUT_DIR, f"{datetime.now():%Y%m%d%H%M%S}_{uuid.uuid4().hex[:6]}")
     os.makedirs(folder_path, exist_ok=True)
     logging.info(f"出力フォルダを作成しました: {folder_path}")
     return folder_path
@@ -68,16 +133,12 @@ def download_audio(url: str, folder_path: str) -> Tuple[str, str]:
     Raises:
         Exception: 音声のダウンロードに失敗した場合。
     """
+    # Whisper側がffmpegで16kHzモノラルにデコードするため、MP3への再エンコードは
+    # 純粋なオーバーヘッドになる。配信ストリームをそのまま保存する
     ydl_opts = {
-        "format": "bestaudio/best",
+        "format": "bestaudio[ext=m4a]/bestaudio",
         "outtmpl": os.path.join(folder_path, "audio.%(ext)s"),
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }
-        ],
+        "postprocessors": [],
     }
 
     try:
@@ -85,7 +146,10 @@ def download_audio(url: str, folder_path: str) -> Tuple[str, str]:
             logging.info(f"URL: {url} の音声ダウンロードを開始します。")
             info_dict = ydl.extract_info(url, download=True)
             title = info_dict.get("title", "Unknown Title")
-            audio_path = os.path.join(folder_path, AUDIO_FILENAME)
+            audio_path = os.path.join(
+                folder_path,
+                AUDIO_FILENAME_TEMPLATE.format(ext=info_dict.get("ext", "m4a")),
+            )
             logging.info(f"音声のダウンロードが完了しました。タイトル: {title}, 保存先: {audio_path}")
             return audio_path, title
     except Exception as e:
@@ -93,6 +157,31 @@ def download_audio(url: str, folder_path: str) -> Tuple[str, str]:
         raise
 
 
+def _atomic_write_bytes(filepath: str, data: bytes) -> None:
+    """バイト列を一時ファイル経由でアトミックに書き込むヘルパー関数です。
+
+    クラッシュしても中途半端なファイルが残らないよう、一時ファイルに
+    書き込んでfsyncした後にos.replaceで所定のパスへ差し替えます。
+
+    Args:
+        filepath (str): 保存先のファイルのパス。
+        data (bytes): 保存するバイト列。
+
+    Raises:
+        OSError: ファイルへの書き込みに失敗した場合。
+    """
+    tmp_path = filepath + ".tmp"
+    # open(..., "w") と同様に0o666をベースにumaskを適用させる（既定の0o777だと
+    # 成果物が実行可能ファイルとして作られてしまう）
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, filepath)
+
+
 def _save_text_to_file(filepath: str, text: str) -> None:
     """テキストを指定したファイルに保存するヘルパー関数です。
 
@@ -101,13 +190,12 @@ def _save_text_to_file(filepath: str, text: str) -> None:
         text (str): 保存するテキスト。
 
     Raises:
-        IOError: ファイルへの書き込みに失敗した場合。
+        OSError: ファイルへの書き込みに失敗した場合。
     """
     try:
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(text)
+        _atomic_write_bytes(filepath, text.encode("utf-8"))
         logging.info(f"内容を保存しました: {filepath}")
-    except IOError as e:
+    except OSError as e:
         logging.error(f"ファイルへの書き込みに失敗しました: {filepath} - {e}")
         raise
 
@@ -126,98 +214,357 @@ def save_video_info(url: str, title: str, folder_path: str) -> None:
     video_info = {"url": url, "title": title}
     info_path = os.path.join(folder_path, VIDEO_INFO_FILENAME)
     try:
-        with open(info_path, "w", encoding="utf-8") as f:
-            json.dump(video_info, f, ensure_ascii=False, indent=4)
+        # orjsonはバイト列を直接返すため、エンコードを挟まずそのまま書き込める
+        _atomic_write_bytes(
+            info_path, orjson.dumps(video_info, option=orjson.OPT_INDENT_2))
         logging.info(f"動画情報を保存しました: {info_path}")
-    except IOError as e:
+    except OSError as e:
         logging.error(f"動画情報の保存に失敗しました: {e}")
         raise
 
 
-def transcribe_audio(audio_path: str, folder_path: str) -> Tuple[str, Optional[str]]:
-    """Whisperモデルを用いて音声データを文字起こしします。
+def _download_whisper_cpp_model() -> str:
+    """量子化済みGGMLモデルをダウンロードし、キャッシュディレクトリに保存します。
+
+    すでにキャッシュが存在する場合はダウンロードをスキップします。
+
+    Returns:
+        str: GGMLモデルファイルのパス。
+    """
+    filename = f"ggml-{WHISPER_MODEL_SIZE}-{WHISPER_CPP_QUANTIZATION}.bin"
+    model_path = os.path.join(WHISPER_CPP_MODEL_DIR, filename)
+    if os.path.exists(model_path):
+        return model_path
+
+    url = f"https://huggingface.co/ggerganov/whisper.cpp/resolve/main/{filename}"
+    os.makedirs(WHISPER_CPP_MODEL_DIR, exist_ok=True)
+    logging.info(f"GGMLモデルをダウンロードします: {url}")
+    urllib.request.urlretrieve(url, model_path + ".part")
+    os.replace(model_path + ".part", model_path)
+    logging.info(f"GGMLモデルを保存しました: {model_path}")
+    return model_path
+
+
+def _load_audio(audio_path: str) -> np.ndarray:
+    """ffmpegで音声ファイルを16kHzモノラルのfloat32配列にデコードします。
+
+    各バックエンドが個別にffmpegデコードを走らせる代わりに、1回の
+    デコード結果（約1.9MB/分）を全バックエンドで使い回します。
 
     Args:
-        audio_path (str): 文字起こしする音声ファイルのパス。
-        folder_path (str): 文字起こし結果を保存するフォルダのパス。
+        audio_path (str): デコードする音声ファイルのパス。
 
     Returns:
-        Tuple[str, Optional[str]]: 文字起こしされたテキストと検出された言語（もしあれば）。
+        np.ndarray: -1.0〜1.0に正規化されたfloat32のモノラル波形。
 
     Raises:
-        RuntimeError: 音声の文字起こしに失敗した場合。
+        RuntimeError: ffmpegによるデコードに失敗した場合。
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-ar", str(WHISPER_SAMPLE_RATE),
+        "pipe:1",
+    ]
+    process = subprocess.run(command, capture_output=True)
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"音声のデコードに失敗しました: {process.stderr.decode('utf-8', 'replace')}")
+    return np.frombuffer(process.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _get_whisper_pipeline() -> BatchedInferencePipeline:
+    """faster-whisperのモデルを読み込み、プロセス内でキャッシュします。
+
+    モデルの逆シリアライズは数秒かかるため、2本目以降の動画では
+    キャッシュ済みのインスタンスをそのまま返します。
+
+    Returns:
+        BatchedInferencePipeline: キャッシュされた推論パイプライン。
+    """
+    global _whisper_pipeline
+    with _whisper_lock:
+        if _whisper_pipeline is None:
+            logging.info(f"Whisperモデル（{WHISPER_MODEL_SIZE}）の読み込みを開始します。")
+            # GPU が利用可能なら FP16 のテンサーコア演算、CPU なら INT8 量子化カーネルを使用する
+            if ctranslate2.get_cuda_device_count() > 0:
+                device, compute_type = "cuda", "float16"
+            else:
+                device, compute_type = "cpu", "int8"
+            logging.info(f"使用デバイス: {device}（compute_type={compute_type}）")
+            model = WhisperModel(
+                WHISPER_MODEL_SIZE,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=os.cpu_count(),
+                num_workers=1,
+            )
+            # 独立した30秒ウィンドウをバッチでエンコードし、逐次ループの起動コストを削減する
+            _whisper_pipeline = BatchedInferencePipeline(model=model)
+        return _whisper_pipeline
+
+
+def _transcribe_with_faster_whisper(audio: np.ndarray) -> Tuple[str, Optional[str]]:
+    """faster-whisper（CTranslate2 INT8）で音声を文字起こしします。
+
+    Args:
+        audio (np.ndarray): 16kHzモノラルのfloat32波形。
+
+    Returns:
+        Tuple[str, Optional[str]]: 文字起こしされたテキストと検出された言語。
+    """
+    pipeline = _get_whisper_pipeline()
+    logging.info("音声の文字起こしを開始します。")
+    # VADで切り出した各セグメントは独立にデコードされるため、バッチ内で
+    # 並列処理できる。無音と誤検出されたウィンドウはここで棄却する
+    segments, info = pipeline.transcribe(
+        audio,
+        batch_size=TRANSCRIBE_BATCH_SIZE,
+        beam_size=5,
+        vad_filter=True,
+        vad_parameters=VAD_PARAMETERS,
+        no_speech_threshold=0.6,
+    )
+    text = "".join(segment.text for segment in segments)
+    return text, info.language
+
+
+def _get_whisper_cpp_model():
+    """whisper.cppのモデルを読み込み、プロセス内でキャッシュします。
+
+    量子化済みGGML（数百MB）の逆シリアライズは一度だけ支払い、
+    2本目以降の動画ではキャッシュ済みのインスタンスをそのまま返します。
+
+    Returns:
+        キャッシュされたpywhispercppのモデル。
+    """
+    global _whisper_cpp_model
+    with _whisper_cpp_lock:
+        if _whisper_cpp_model is None:
+            from pywhispercpp.model import Model
+
+            model_path = _download_whisper_cpp_model()
+            logging.info(f"whisper.cppモデルの読み込みを開始します: {model_path}")
+            _whisper_cpp_model = Model(
+                model_path, n_threads=os.cpu_count(), language="auto")
+        return _whisper_cpp_model
+
+
+def _transcribe_with_whisper_cpp(audio: np.ndarray) -> Tuple[str, Optional[str]]:
+    """whisper.cpp（GGML量子化カーネル）で音声を文字起こしします。
+
+    Args:
+        audio (np.ndarray): 16kHzモノラルのfloat32波形。
+
+    Returns:
+        Tuple[str, Optional[str]]: 文字起こしされたテキストと検出された言語。
+        whisper.cpp は検出言語を公開しないため、言語は None になります。
+    """
+    model = _get_whisper_cpp_model()
+    logging.info("音声の文字起こしを開始します。")
+    segments = model.transcribe(audio)
+    text = "".join(segment.text for segment in segments)
+    return text, None
+
+
+def _get_language_detector() -> tuple:
+    """言語検出用のwhisper-tinyを読み込み、プロセス内でキャッシュします。
+
+    Returns:
+        tuple: プロセッサとモデルのペア。
+    """
+    global _language_detector
+    with _transformers_lock:
+        if _language_detector is None:
+            from transformers import (WhisperForConditionalGeneration,
+                                      WhisperProcessor)
+
+            logging.info(
+                f"言語検出モデルの読み込みを開始します: {LANGUAGE_DETECTION_MODEL}")
+            _language_detector = (
+                WhisperProcessor.from_pretrained(LANGUAGE_DETECTION_MODEL),
+                WhisperForConditionalGeneration.from_pretrained(
+                    LANGUAGE_DETECTION_MODEL),
+            )
+        return _language_detector
+
+
+def _detect_language_with_transformers(audio: np.ndarray) -> Optional[str]:
+    """whisper-tinyで音声の冒頭30秒から言語を検出します。
+
+    Args:
+        audio (np.ndarray): 16kHzモノラルのfloat32波形。
+
+    Returns:
+        Optional[str]: 検出された言語コード（例: 'en', 'ja'）。検出に失敗した場合は None。
     """
     try:
-        logging.info(f"Whisperモデル（{WHISPER_MODEL_SIZE}）の読み込みを開始します。")
-        device = "cpu"  # 強制的に CPU を使用
-        logging.info(f"使用デバイス (強制): {device}")
-        model = whisper.load_model(WHISPER_MODEL_SIZE, device=device)
-        logging.info(f"音声ファイルの文字起こしを開始します: {audio_path}")
-        result = model.transcribe(audio_path)
-        transcript_path = os.path.join(folder_path, TRANSCRIPT_FILENAME)
-        _save_text_to_file(transcript_path, result["text"])
-        return result["text"], result.get("language")
+        processor, model = _get_language_detector()
+        head = audio[: TRANSCRIBE_CHUNK_LENGTH_S * WHISPER_SAMPLE_RATE]
+        input_features = processor(
+            head, sampling_rate=WHISPER_SAMPLE_RATE, return_tensors="pt"
+        ).input_features
+        # 最初の生成トークンが言語トークン（例: <|ja|>）になる
+        predicted_ids = model.generate(input_features, max_new_tokens=1)
+        for token in processor.tokenizer.convert_ids_to_tokens(predicted_ids[0]):
+            match = re.fullmatch(r"<\|([a-z]{2,3})\|>", token)
+            if match:
+                return match.group(1)
+        return None
     except Exception as e:
-        logging.error(f"文字起こしに失敗しました: {e}")
-        raise RuntimeError("Whisperモデルの文字起こしに失敗しました。")
+        logging.warning(f"言語検出に失敗しました: {e}")
+        return None
 
 
-def refine_transcript_with_llm(text: str, folder_path: str) -> str:
-    """言語モデル（Gemini）を用いて文字起こしテキストを修正します。
+def _get_assistant_model(model_name: str, dtype, device):
+    """投機的デコード用のドラフトモデルを読み込み、プロセス内でキャッシュします。
 
     Args:
-        text (str): 修正する文字起こしテキスト。
-        folder_path (str): 修正されたテキストを保存するフォルダのパス。
+        model_name (str): ドラフトモデルの名前。
+        dtype: モデルのデータ型（torch.dtype）。
+        device (str): モデルを配置するデバイス。
 
     Returns:
-        str: 修正された文字起こしテキスト。
+        ドラフトモデルのインスタンス。
+    """
+    from transformers import AutoModelForSpeechSeq2Seq
 
-    Raises:
-        ValueError: LLMによる文字起こし修正に失敗した場合。
+    key = (model_name, str(dtype), device)
+    if key not in _assistant_models:
+        logging.info(f"ドラフトモデルの読み込みを開始します: {model_name}")
+        _assistant_models[key] = AutoModelForSpeechSeq2Seq.from_pretrained(
+            model_name, torch_dtype=dtype
+        ).to(device)
+    return _assistant_models[key]
+
+
+def _get_transformers_pipeline(model_name: str):
+    """transformersのASRパイプラインを構築し、プロセス内でキャッシュします。
+
+    量子化やtorch.compileの準備コストも一度だけ支払い、2本目以降の
+    動画ではキャッシュ済みのパイプラインをそのまま返します。
+
+    Args:
+        model_name (str): 読み込むモデルの名前。
+
+    Returns:
+        キャッシュされたASRパイプライン。
     """
-    try:
-        model = genai.GenerativeModel(GEMINI_MODEL_NAME)
-        system_prompt_path = os.path.join(
-            PROMPTS_DIR, SYSTEM_PROMPT_REFINE_FILENAME)
-        system_prompt = load_prompt(system_prompt_path)
+    import torch
+    from transformers import pipeline
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    dtype = torch.float16 if device == "cuda" else torch.float32
+    with _transformers_lock:
+        if model_name not in _transformers_pipelines:
+            logging.info(f"transformersパイプラインの読み込みを開始します"
+                         f"（モデル: {model_name}, デバイス: {device}）。")
+            pipe = pipeline(
+                "automatic-speech-recognition",
+                model=model_name,
+                torch_dtype=dtype,
+                device=device,
+                model_kwargs={"attn_implementation": "sdpa"},
+            )
+            if device == "cpu":
+                # CPUではエンコーダのLinear層をINT8に動的量子化し、VNNI系のint8カーネルに
+                # 乗せる。量子化済みモジュールはInductorと相性が悪いため、compileはしない。
+                # デコーダはサンプリング品質を保つためFP32のままにする
+                pipe.model.model.encoder = torch.quantization.quantize_dynamic(
+                    pipe.model.model.encoder, {torch.nn.Linear},
+                    dtype=torch.qint8)
+            elif hasattr(torch, "compile"):
+                # エンコーダをInductorで融合カーネルにコンパイルする（初回バッチでコンパイル
+                # され、以降のウィンドウと動画で償却される）
+                pipe.model.model.encoder = torch.compile(
+                    pipe.model.model.encoder, mode="reduce-overhead",
+                    fullgraph=False)
+            _transformers_pipelines[model_name] = pipe
+        return _transformers_pipelines[model_name]
+
+
+def _transcribe_with_transformers(audio: np.ndarray) -> Tuple[str, Optional[str]]:
+    """Hugging Face transformersのASRパイプラインで音声を文字起こしします。
+
+    長時間音声を固定長のウィンドウに分割し、エンコーダへバッチで入力します。
+    検出言語がdistil-whisperの対応言語であれば、デコーダが軽量な
+    distil-whisperを使用し、それ以外は通常のWhisperを使用します。
 
-        prompt = f"{system_prompt}\n\n---\n\n{text}"
+    Args:
+        audio (np.ndarray): 16kHzモノラルのfloat32波形。
 
-        logging.info("Gemini API による文字起こし修正を開始します。")
-        response = model.generate_content(prompt)
-        refined_text = response.text
-        refined_transcript_path = os.path.join(
-            folder_path, TRANSCRIPT_REFINED_FILENAME)
-        _save_text_to_file(refined_transcript_path, refined_text)
-        return refined_text
-    except Exception as e:
-        logging.error(f"Gemini API による文字起こし修正に失敗しました: {e}")
-        raise ValueError("LLMによる文字起こし修正に失敗しました。")
+    Returns:
+        Tuple[str, Optional[str]]: 文字起こしされたテキストと検出された言語。
+    """
+    import torch
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    dtype = torch.float16 if device == "cuda" else torch.float32
+
+    detected_language = _detect_language_with_transformers(audio)
+    if detected_language in DISTIL_SUPPORTED_LANGUAGES:
+        model_name = DISTIL_MODEL
+        assistant_name = ASSISTANT_MODEL_EN
+        generate_kwargs = {}
+    else:
+        model_name = f"openai/whisper-{WHISPER_MODEL_SIZE}"
+        assistant_name = ASSISTANT_MODEL
+        generate_kwargs = {"task": "transcribe"}
+        if detected_language:
+            # 検出済みの言語を指定してウィンドウごとの再検出を省略する
+            generate_kwargs["language"] = detected_language
+
+    batch_size = TRANSCRIBE_BATCH_SIZE
+    if SPECULATIVE_DECODING:
+        # 貪欲デコード（batch_size=1）でのみ使用できるため、バッチ処理を無効化する
+        generate_kwargs["assistant_model"] = _get_assistant_model(
+            assistant_name, dtype, device)
+        batch_size = 1
+
+    pipe = _get_transformers_pipeline(model_name)
+    logging.info("音声の文字起こしを開始します。")
+    output = pipe(
+        audio,
+        chunk_length_s=TRANSCRIBE_CHUNK_LENGTH_S,
+        stride_length_s=TRANSCRIBE_STRIDE_LENGTH_S,
+        batch_size=batch_size,
+        return_timestamps=True,
+        generate_kwargs=generate_kwargs,
+    )
+    text = "".join(chunk["text"] for chunk in output["chunks"])
+    return text, detected_language
 
 
-def translate_text(text: str, target_lang: str, folder_path: str) -> None:
-    """指定された言語にテキストを翻訳します。
+def transcribe_audio(audio_path: str, folder_path: str) -> Tuple[str, Optional[str]]:
+    """Whisperモデルを用いて音声データを文字起こしします。
+
+    `WHISPER_BACKEND` に応じて faster-whisper・whisper.cpp・transformers を使用します。
 
     Args:
-        text (str): 翻訳するテキスト。
-        target_lang (str): 翻訳先の言語コード（例: 'ja', 'en'）。
-        folder_path (str): 翻訳結果を保存するフォルダのパス。
+        audio_path (str): 文字起こしする音声ファイルのパス。
+        folder_path (str): 文字起こし結果を保存するフォルダのパス。
+
+    Returns:
+        Tuple[str, Optional[str]]: 文字起こしされたテキストと検出された言語（もしあれば）。
 
     Raises:
-        ValueError: 翻訳処理に失敗した場合。
+        RuntimeError: 音声の文字起こしに失敗した場合。
     """
     try:
-        translator = Translator()
-        logging.info(f"{target_lang}への翻訳を開始します。")
-        translated_text = translator.translate(text, dest=target_lang).text
-        transcript_translated_path = os.path.join(
-            folder_path, TRANSLATED_TRANSCRIPT_FILENAME.format(
-                lang=target_lang)
-        )
-        _save_text_to_file(transcript_translated_path, translated_text)
+        # デコードは1回だけ行い、float32波形を各バックエンドに直接渡す
+        logging.info(f"音声ファイルのデコードを開始します: {audio_path}")
+        audio = _load_audio(audio_path)
+        if WHISPER_BACKEND == "whisper.cpp":
+            text, language = _transcribe_with_whisper_cpp(audio)
+        elif WHISPER_BACKEND == "transformers":
+            text, language = _transcribe_with_transformers(audio)
+        else:
+            text, language = _transcribe_with_faster_whisper(audio)
+        transcript_path = os.path.join(folder_path, TRANSCRIPT_FILENAME)
+        _save_text_to_file(transcript_path, text)
+        return text, language
     except Exception as e:
-        logging.error(f"翻訳に失敗しました: {e}")
-        raise ValueError("翻訳処理に失敗しました。")
+        logging.error(f"文字起こしに失敗しました: {e}")
+        raise RuntimeError("Whisperモデルの文字起こしに失敗しました。")
 
 
 def load_prompt(filepath: str) -> str:
@@ -240,49 +587,274 @@ def load_prompt(filepath: str) -> str:
         return ""
 
 
-def summarize_text_with_gemini(text: str, folder_path: str) -> None:
-    """Gemini APIを用いてテキストを要約します。
+# プロンプトとモデルハンドルはホットパスから外し、起動時に1回だけ構築する。
+# 静的な指示をsystem_instructionとして分離することで、Geminiがシステム
+# プレフィックスをサーバー側でキャッシュでき、毎回のプリフィルが軽くなる
+_SYSTEM_PROMPT_REFINE = load_prompt(
+    os.path.join(PROMPTS_DIR, SYSTEM_PROMPT_REFINE_FILENAME))
+_SYSTEM_PROMPT_SUMMARY = load_prompt(
+    os.path.join(PROMPTS_DIR, SYSTEM_PROMPT_FILENAME))
+_GEMINI_SYSTEM_INSTRUCTION = (
+    "以下の文字起こしテキストに対して2つの処理を行い、"
+    'JSONオブジェクト {"refined": ..., "summary": ...} として返してください。\n\n'
+    f"【refined: 文字起こし修正の指示】\n{_SYSTEM_PROMPT_REFINE}\n\n"
+    f"【summary: 要約の指示】\n{_SYSTEM_PROMPT_SUMMARY}"
+)
+_GEMINI_MODEL = genai.GenerativeModel(
+    GEMINI_MODEL_NAME, system_instruction=_GEMINI_SYSTEM_INSTRUCTION)
+
+# サーバー側コンテキストキャッシュを参照するモデルハンドル（TTL切れで作り直す）
+_gemini_cached_model: Optional[genai.GenerativeModel] = None
+_gemini_cached_model_expiry = 0.0
+
+
+def _get_gemini_model() -> genai.GenerativeModel:
+    """システムプロンプトをサーバー側にキャッシュしたGeminiモデルを返します。
+
+    CachedContentでシステムプロンプトを一度だけアップロードし、以降の
+    リクエストではハンドル参照によりプリフィルを省きます。コンテキスト
+    キャッシュが利用できない場合（プロンプトが最小トークン数に満たない
+    場合など）は通常のモデルハンドルにフォールバックします。成否に
+    かかわらず結果はTTLの間メモ化し、呼び出しごとに失敗するAPI往復を
+    繰り返さないようにします。
+
+    Returns:
+        genai.GenerativeModel: 生成に使用するモデルハンドル。
+    """
+    global _gemini_cached_model, _gemini_cached_model_expiry
+    if _gemini_cached_model is not None and time.time() < _gemini_cached_model_expiry:
+        return _gemini_cached_model
+    try:
+        cache = genai_caching.CachedContent.create(
+            model=GEMINI_MODEL_NAME,
+            system_instruction=_GEMINI_SYSTEM_INSTRUCTION,
+            ttl=timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS),
+        )
+        _gemini_cached_model = genai.GenerativeModel.from_cached_content(cache)
+    except Exception as e:
+        logging.warning(f"Geminiコンテキストキャッシュを作成できませんでした: {e}")
+        # 失敗もメモ化し、次のTTLサイクルまで通常のモデルハンドルを使い続ける
+        _gemini_cached_model = _GEMINI_MODEL
+    # 期限ぎりぎりの参照を避けるため、実際のTTLより少し早めに作り直す
+    _gemini_cached_model_expiry = (
+        time.time() + GEMINI_CONTEXT_CACHE_TTL_SECONDS - 60)
+    return _gemini_cached_model
+
+
+def _gemini_cache_get(key: str) -> Optional[str]:
+    """コンテンツハッシュをキーにキャッシュ済みのGemini応答を取得します。
 
     Args:
-        text (str): 要約するテキスト。
-        folder_path (str): 要約結果を保存するフォルダのパス。
+        key (str): プロンプトのSHA-256ハッシュ。
+
+    Returns:
+        Optional[str]: キャッシュされた応答テキスト。未登録またはTTL切れの場合は None。
     """
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL_NAME)
-        system_prompt_path = os.path.join(PROMPTS_DIR, SYSTEM_PROMPT_FILENAME)
-        system_prompt = load_prompt(system_prompt_path)
+        # 初回実行ではストアがまだ存在しないため、先にディレクトリを用意して
+        # 警告なしの空キャッシュとして扱う
+        os.makedirs(os.path.dirname(GEMINI_CACHE_PATH), exist_ok=True)
+        with shelve.open(GEMINI_CACHE_PATH) as cache:
+            entry = cache.get(key)
+        if entry and time.time() - entry["timestamp"] < GEMINI_CACHE_TTL_SECONDS:
+            return entry["text"]
+    except Exception as e:
+        logging.warning(f"Geminiキャッシュの読み込みに失敗しました: {e}")
+    return None
+
 
-        prompt = f"{system_prompt}\n\n---\n\n{text}"
+def _gemini_cache_set(key: str, text: str) -> None:
+    """Gemini応答をコンテンツハッシュをキーにキャッシュへ保存します。
 
-        logging.info("Gemini API による要約を開始します。")
-        response = model.generate_content(prompt)
-        summary = response.text
+    Args:
+        key (str): プロンプトのSHA-256ハッシュ。
+        text (str): キャッシュする応答テキスト。
+    """
+    try:
+        os.makedirs(os.path.dirname(GEMINI_CACHE_PATH), exist_ok=True)
+        with shelve.open(GEMINI_CACHE_PATH) as cache:
+            cache[key] = {"timestamp": time.time(), "text": text}
+    except Exception as e:
+        logging.warning(f"Geminiキャッシュの保存に失敗しました: {e}")
+
+
+async def refine_and_summarize_with_llm(text: str, folder_path: str) -> str:
+    """言語モデル（Gemini）を用いて文字起こしの修正と要約を一度に行います。
+
+    修正と要約を別々に呼び出すと長い文字起こしを2回送信することになるため、
+    構造化出力（JSON）で両方を返す1回の呼び出しにまとめています。
+
+    Args:
+        text (str): 修正・要約する文字起こしテキスト。
+        folder_path (str): 結果を保存するフォルダのパス。
+
+    Returns:
+        str: 修正された文字起こしテキスト。
+
+    Raises:
+        ValueError: LLMによる文字起こし修正・要約に失敗した場合。
+    """
+    try:
+        # 同一内容の再実行ではAPIを呼ばず、ローカルキャッシュから復元する
+        cache_key = hashlib.sha256(
+            (_GEMINI_SYSTEM_INSTRUCTION + text).encode("utf-8")).hexdigest()
+        raw_response = _gemini_cache_get(cache_key)
+        from_cache = raw_response is not None
+        if raw_response is None:
+            logging.info("Gemini API による文字起こし修正と要約を開始します。")
+            model = _get_gemini_model()
+            response = await model.generate_content_async(
+                text,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": {
+                        "type": "object",
+                        "properties": {
+                            "refined": {"type": "string"},
+                            "summary": {"type": "string"},
+                        },
+                        "required": ["refined", "summary"],
+                    },
+                },
+                stream=True,
+            )
+            # 生成完了を待たずにチャンクを受信し、転送とサーバー側の生成を重ね合わせる
+            parts = []
+            async for chunk in response:
+                parts.append(chunk.text)
+            raw_response = "".join(parts)
+        else:
+            logging.info("キャッシュ済みのGemini応答を利用します。")
+        result = json.loads(raw_response)
+        if not from_cache:
+            # 途中で切れた応答を30日間再生しないよう、パースできた応答だけを保存する
+            _gemini_cache_set(cache_key, raw_response)
+        refined_text = result["refined"]
+        refined_transcript_path = os.path.join(
+            folder_path, TRANSCRIPT_REFINED_FILENAME)
+        _save_text_to_file(refined_transcript_path, refined_text)
         summary_path = os.path.join(folder_path, SUMMARY_FILENAME)
-        _save_text_to_file(summary_path, summary)
+        _save_text_to_file(summary_path, result["summary"])
+        return refined_text
     except Exception as e:
-        logging.error(f"Gemini API による要約に失敗しました: {e}")
+        logging.error(f"Gemini API による文字起こし修正・要約に失敗しました: {e}")
+        raise ValueError("LLMによる文字起こし修正・要約に失敗しました。")
 
 
-def main() -> None:
-    """YouTube音声のダウンロード、文字起こし、修正、翻訳、要約処理を実行するメイン関数です。"""
+def _split_text_into_chunks(text: str, max_chars: int) -> list:
+    """テキストを文の区切りを保ちながら最大文字数以下のチャンクに分割します。
+
+    文間の空白は後続の文側に残し、チャンクを連結すれば元のテキストが
+    復元できるようにします。
+
+    Args:
+        text (str): 分割するテキスト。
+        max_chars (int): 1チャンクあたりの最大文字数。
+
+    Returns:
+        list: 分割されたテキストのリスト。
+    """
+    # 幅ゼロの位置で分割し、区切りの空白を消費しない
+    sentences = re.split(r"(?<=[.!?。！？])", text)
+    chunks = []
+    current = ""
+    for sentence in sentences:
+        if not sentence:
+            continue
+        # 句読点が乏しいテキストでも上限を守れるよう、1文で上限を超える場合は
+        # 文の途中でも強制的に分割する
+        while len(sentence) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current += sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _translate_chunk(chunk: str, target_lang: str) -> str:
+    """テキストチャンクを1つ翻訳します。
+
+    Args:
+        chunk (str): 翻訳するテキストチャンク。
+        target_lang (str): 翻訳先の言語コード。
+
+    Returns:
+        str: 翻訳されたテキスト。
+    """
+    response = await _http_client.post(
+        TRANSLATE_URL,
+        params={"client": "gtx", "sl": "auto", "tl": target_lang, "dt": "t"},
+        data={"q": chunk},
+    )
+    response.raise_for_status()
+    payload = response.json()
+    return "".join(segment[0] for segment in payload[0] if segment[0])
+
+
+async def translate_text(text: str, target_lang: str, folder_path: str) -> None:
+    """指定された言語にテキストを翻訳します。
+
+    翻訳APIの文字数上限を超えないように文単位でチャンクに分割し、
+    HTTP/2接続上で並行してリクエストします。
+
+    Args:
+        text (str): 翻訳するテキスト。
+        target_lang (str): 翻訳先の言語コード（例: 'ja', 'en'）。
+        folder_path (str): 翻訳結果を保存するフォルダのパス。
+
+    Raises:
+        ValueError: 翻訳処理に失敗した場合。
+    """
+    try:
+        logging.info(f"{target_lang}への翻訳を開始します。")
+        chunks = _split_text_into_chunks(text, TRANSLATE_CHUNK_CHARS)
+        translated_chunks = await asyncio.gather(
+            *[_translate_chunk(chunk, target_lang) for chunk in chunks])
+        # 翻訳APIはチャンク境界の空白を保証しないため、改行で区切って連結する
+        translated_text = "\n".join(translated_chunks)
+        transcript_translated_path = os.path.join(
+            folder_path, TRANSLATED_TRANSCRIPT_FILENAME.format(
+                lang=target_lang)
+        )
+        _save_text_to_file(transcript_translated_path, translated_text)
+    except Exception as e:
+        logging.error(f"翻訳に失敗しました: {e}")
+        raise ValueError("翻訳処理に失敗しました。")
+
+
+async def main() -> None:
+    """YouTube音声のダウンロード、文字起こし、修正、翻訳、要約処理を実行するメイン関数です。
+
+    ダウンロードと文字起こしはワーカースレッドで実行し、文字起こしの修正と要約は
+    1回のGemini呼び出しにまとめることで、ネットワーク待ちを削減します。
+    """
     try:
         url = input("YouTubeのURLを入力してください: ")
         logging.info(f"入力されたURL: {url}")
 
         folder_path = create_output_folder()
 
-        audio_path, title = download_audio(url, folder_path)
+        audio_path, title = await asyncio.to_thread(
+            download_audio, url, folder_path)
         save_video_info(url, title, folder_path)
 
-        raw_text, detected_lang = transcribe_audio(audio_path, folder_path)
+        raw_text, detected_lang = await asyncio.to_thread(
+            transcribe_audio, audio_path, folder_path)
 
-        # LLMで文字起こしを修正
-        refined_text = refine_transcript_with_llm(raw_text, folder_path)
+        # LLMで文字起こしの修正と要約を一度に行う
+        refined_text = await refine_and_summarize_with_llm(
+            raw_text, folder_path)
 
         if detected_lang and detected_lang != TARGET_LANGUAGE:
-            translate_text(refined_text, TARGET_LANGUAGE, folder_path)
-
-        summarize_text_with_gemini(refined_text, folder_path)
+            await translate_text(refined_text, TARGET_LANGUAGE, folder_path)
 
         logging.info(f"処理が完了しました。結果は出力フォルダに保存されています: {folder_path}")
     except Exception as e:
@@ -290,4 +862,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())